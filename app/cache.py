@@ -0,0 +1,112 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Two-tier cache for analysis results: exact text match, then semantic similarity"""
+
+    def __init__(self, maxsize: int, ttl: int, namespace: str = "", semantic: bool = False,
+                 threshold: float = 0.92, model_name: str = "all-MiniLM-L6-v2"):
+        self.maxsize = maxsize
+        # Mixed into every key so results from different LLMs never collide
+        self.namespace = namespace
+        self.semantic = semantic
+        self.threshold = threshold
+        self.model_name = model_name
+        self._exact = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._model = None
+        # Preallocated (maxsize, dim) matrix, created on first insert; row i holds the
+        # normalized embedding of the text cached under _keys[i]. Inserts write a row in
+        # place, so the matrix is never copied.
+        self._vectors = None
+        self._keys = [None] * maxsize
+        # key -> row, in write order (oldest first) so a full matrix evicts the oldest row
+        self._slots = OrderedDict()
+        # Rows released after their response expired, reused before evicting anything
+        self._free = []
+        self._filled = 0
+
+    def key(self, text: str) -> str:
+        normalized = f"{self.namespace}\0{text.strip().lower()}"
+        return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+    def get(self, text: str):
+        """Exact-match lookup on the normalized text"""
+        return self._exact.get(self.key(text))
+
+    def embed(self, text: str):
+        """Normalized sentence embedding for text, or None when the semantic tier is off.
+
+        Loading the model and encoding are CPU-bound, so call this off the event loop.
+        """
+        if not self.semantic:
+            return None
+        if self._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                logger.warning("sentence-transformers not installed, disabling semantic cache")
+                self.semantic = False
+                return None
+            try:
+                self._model = SentenceTransformer(self.model_name)
+            except Exception as e:
+                # e.g. the model can't be downloaded; don't retry the load on every miss
+                logger.warning("Could not load %s, disabling semantic cache: %s", self.model_name, e)
+                self.semantic = False
+                return None
+        return self._model.encode([text.strip().lower()], normalize_embeddings=True)[0]
+
+    def get_similar(self, vector):
+        """Return the cached response whose text is most similar to vector, if above threshold"""
+        if vector is None or self._filled == 0:
+            return None
+        scores = self._vectors[:self._filled] @ vector
+        while True:
+            best = int(scores.argmax())
+            if scores[best] < self.threshold:
+                return None
+            # The exact tier owns expiry; free a stale row and try the next best one
+            response = self._exact.get(self._keys[best])
+            if response is not None:
+                return response
+            self._release(best)
+            scores[best] = -1.0
+
+    def put(self, text: str, response, vector=None):
+        key = self.key(text)
+        self._exact[key] = response
+        if vector is None:
+            return
+
+        if self._vectors is None:
+            import numpy as np
+            self._vectors = np.zeros((self.maxsize, vector.shape[-1]), dtype=np.float32)
+
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            slot = self._next_slot()
+        self._vectors[slot] = vector
+        self._keys[slot] = key
+        self._slots[key] = slot
+
+    def _next_slot(self) -> int:
+        """A released row, else the next unused row, else the oldest-written row"""
+        if self._free:
+            return self._free.pop()
+        if self._filled < self.maxsize:
+            self._filled += 1
+            return self._filled - 1
+        _, slot = self._slots.popitem(last=False)
+        return slot
+
+    def _release(self, slot: int):
+        self._slots.pop(self._keys[slot], None)
+        self._keys[slot] = None
+        # A zero row scores 0 and never clears the threshold
+        self._vectors[slot] = 0
+        self._free.append(slot)
@@ -5,4 +5,22 @@ load_dotenv()
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
\ No newline at end of file
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Response cache for /analyze
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "86400"))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2")
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING")
+
+# OpenRouter connection pool per worker; raise alongside your provider rate-limit tier
+OPENROUTER_MAX_CONN = int(os.getenv("OPENROUTER_MAX_CONN", "200"))
+
+# Cap on concurrent outbound OpenRouter calls per worker
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))
+# Concurrent analyses per analyze_speech_batch call
+ANALYZE_BATCH_CONCURRENCY = int(os.getenv("ANALYZE_BATCH_CONCURRENCY", "20"))
+# Optional uvicorn --limit-concurrency; unset means unlimited
+LIMIT_CONCURRENCY = int(os.getenv("LIMIT_CONCURRENCY", "0")) or None
@@ -0,0 +1,36 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+_listener = None
+
+
+def setup_logging(level: str) -> QueueListener:
+    """Route the app's log records through a queue so formatting and stdout writes
+    happen on a background thread instead of the event loop"""
+    global _listener
+    # app.main can be imported twice (as __main__, then by uvicorn); configure once
+    if _listener is not None:
+        return _listener
+
+    # The format below uses none of these, so skip collecting them for every record
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler)
+
+    logger = logging.getLogger("app")
+    logger.setLevel(level.upper())
+    logger.addHandler(QueueHandler(log_queue))
+    logger.propagate = False
+
+    listener.start()
+    atexit.register(listener.stop)
+    _listener = listener
+    return listener
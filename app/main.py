@@ -1,8 +1,35 @@
+import os
+import logging
+from typing import List
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from app.config import LOG_LEVEL, LIMIT_CONCURRENCY
+from app.log import setup_logging
+
+# Configure logging before importing app modules that log at import time
+setup_logging(LOG_LEVEL)
+
+from app.models import SpeechInput, SpeechBatchInput, AnalysisResponse
 from app.services import speech_analysis
 
-app = FastAPI(title="ClarityAI Text Analysis Backend")
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled session for all outbound OpenRouter calls
+    speech_analysis.start()
+    await speech_analysis.warm_up()
+    yield
+    await speech_analysis.close()
+
+app = FastAPI(
+    title="ClarityAI Text Analysis Backend",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # CORS
 app.add_middleware(
@@ -13,27 +40,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON bodies (three rewritten speeches easily run to several KB)
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 @app.get("/")
 async def root():
     return {"message": "ClarityAI Text Analysis Backend"}
 
-@app.post("/analyze")
-async def analyze_speech(request_data: dict):
-    """Analyze speech and generate alternatives"""
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    if not speech_analysis.is_ready():
+        return ORJSONResponse({"status": "busy"}, status_code=503)
+    return {"status": "ready"}
+
+@app.post("/analyze", response_model=AnalysisResponse)
+async def analyze_speech(body: SpeechInput, force_llm: bool = False):
+    """Analyze speech and generate alternatives.
+
+    Very short inputs get a templated response; pass force_llm=true to always query the model.
+    """
     try:
-        text = request_data.get("text", "")
-        if not text.strip():
-            raise HTTPException(status_code=400, detail="Text cannot be empty")
-        
-        print(f"Analyzing text: {text[:100]}...")
-        analysis = await speech_analysis.analyze_speech(text)
-        print(f"Analysis completed successfully")
+        text = body.text
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Analyzing text: %s...", text[:100])
+        analysis = await speech_analysis.analyze_speech(text, force_llm=force_llm)
+        logger.debug("Analysis completed successfully")
         return analysis
     
     except Exception as e:
-        print(f"Analysis error: {e}")
+        logger.error("Analysis error: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/analyze/batch", response_model=List[AnalysisResponse])
+async def analyze_speech_batch(body: SpeechBatchInput):
+    """Analyze several speeches concurrently; results are in request order"""
+    try:
+        return await speech_analysis.analyze_speech_batch(body.texts, force_llm=body.force_llm)
+    except Exception as e:
+        logger.error("Batch analysis error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # uvloop/httptools ship with uvicorn[standard]. In production prefer
+    # gunicorn app.main:app -k uvicorn.workers.UvicornWorker -w $((2 * $(nproc) + 1))
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        limit_concurrency=LIMIT_CONCURRENCY,
+    )
\ No newline at end of file
@@ -0,0 +1,45 @@
+from typing import Annotated, List
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, StringConstraints
+
+# Keeps the input-scaled output budget (6 tokens/word) within 12k tokens,
+# under the original 15k max_tokens and the model's context window
+MAX_SPEECH_WORDS = 2000
+
+
+def _check_word_count(text: str) -> str:
+    if len(text.split()) > MAX_SPEECH_WORDS:
+        raise ValueError(f"Speech must be at most {MAX_SPEECH_WORDS} words")
+    return text
+
+
+SpeechText = Annotated[
+    str,
+    StringConstraints(min_length=1, strip_whitespace=True),
+    AfterValidator(_check_word_count),
+]
+
+
+class SpeechInput(BaseModel):
+    text: SpeechText
+
+
+class SpeechBatchInput(BaseModel):
+    texts: Annotated[List[SpeechText], Field(min_length=1, max_length=100)]
+    # Same as /analyze?force_llm=true: skip the short-text heuristic for every item
+    force_llm: bool = False
+
+
+# extra="forbid" emits additionalProperties: false, which strict JSON-schema mode requires
+class AlternateSpeech(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    demographic: str
+    speech: str
+
+
+class AnalysisResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    category: str
+    demographics: List[str]
+    alternateSpeeches: List[AlternateSpeech]
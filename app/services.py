@@ -1,97 +1,315 @@
-import httpx
-import json
-from app.config import OPENROUTER_API_KEY
+import asyncio
+import logging
+import random
+import aiohttp
+import orjson
+from typing import List
+from pydantic import TypeAdapter, ValidationError
+from app.cache import ResponseCache
+from app.config import (
+    OPENROUTER_API_KEY,
+    OPENROUTER_MAX_CONN,
+    LLM_CONCURRENCY,
+    ANALYZE_BATCH_CONCURRENCY,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL_SECONDS,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MODEL,
+)
+from app.models import AnalysisResponse
 
-print(f"OpenRouter API Key configured: {bool(OPENROUTER_API_KEY)}")
+logger = logging.getLogger(__name__)
+logger.info("OpenRouter API Key configured: %s", bool(OPENROUTER_API_KEY))
 
-class SpeechAnalysisService:
-    def __init__(self):
-        self.api_key = OPENROUTER_API_KEY
-        self.base_url = "https://openrouter.ai/api/v1"
-        self.model = "mistralai/mistral-7b-instruct"
-    
-    async def analyze_speech(self, text: str) -> dict:
-        """Analyze speech and generate alternatives with the same length"""
-        
-        if not self.api_key:
-            print("ERROR: No OpenRouter API key configured!")
-            return self._fallback_response()
-        
-        prompt = f"""
+# Output token budget: three rewrites of the input (~1.3 tokens/word each) plus the JSON
+# scaffold fit in 6 tokens per input word; the floor covers the scaffold for short inputs.
+# Never clamp below the per-word budget or long speeches get cut off mid-JSON.
+TOKENS_PER_INPUT_WORD = 6
+MIN_OUTPUT_TOKENS = 256
+# Transient upstream failures (rate limits, 5xx, transport errors) are retried with backoff
+REQUEST_ATTEMPTS = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_BASE_DELAY = 0.5
+MAX_RETRY_DELAY = 10.0
+# Wall-clock budget in seconds for one OpenRouter call including all retries and backoff
+REQUEST_DEADLINE = 30.0
+# Inputs with fewer words than this get a templated response unless force_llm is set
+SHORT_TEXT_WORDS = 8
+
+ANALYSIS_ADAPTER = TypeAdapter(AnalysisResponse)
+# Strict schema-constrained output in the AnalysisResponse shape
+ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "analysis", "strict": True, "schema": ANALYSIS_ADAPTER.json_schema()},
+}
+
+# Fixed parts of the analyze prompt; the speech text is concatenated between them
+_PROMPT_PREFIX = """
         Analyze this speech and provide a JSON response:
 
-        Speech: "{text}"
+        Speech: \""""
+_PROMPT_SUFFIX = """\"
 
         Return JSON in this exact format:
-        {{
+        {
             "category": "The main category (politics, economics, climate, etc.)",
             "demographics": ["3 different demographic perspectives"],
             "alternateSpeeches": [
-                {{
+                {
                     "demographic": "First demographic",
                     "speech": "Rewritten speech for this demographic, considering what they care about. Match original speech length."
-                }},
-                {{
+                },
+                {
                     "demographic": "Second demographic", 
                     "speech": "Rewritten speech for this demographic, considering what they care about. Match original speech length."
-                }},
-                {{
+                },
+                {
                     "demographic": "Third demographic",
                     "speech": "Rewritten speech for this demographic, considering what they care about. Match original speech length."
-                }}
+                }
             ]
-        }}
+        }
 
         Only return the JSON, no other text.
         """
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+class SpeechAnalysisService:
+    def __init__(self, session: aiohttp.ClientSession = None):
+        # Long-lived session opened in the app lifespan; reused across requests for keep-alive
+        self.session = session
+        self.api_key = OPENROUTER_API_KEY
+        self.base_url = "https://openrouter.ai/api/v1"
+        self.model = "mistralai/mistral-7b-instruct"
+        self.cache = ResponseCache(
+            maxsize=CACHE_MAX_ENTRIES,
+            ttl=CACHE_TTL_SECONDS,
+            namespace=self.model,
+            semantic=SEMANTIC_CACHE_ENABLED,
+            threshold=SEMANTIC_CACHE_THRESHOLD,
+            model_name=SEMANTIC_CACHE_MODEL,
+        )
+        self._inflight = {}
+        self._llm_sem = asyncio.Semaphore(LLM_CONCURRENCY)
+        # Built once; served on every upstream failure
+        self._fallback = self._build_fallback_response()
+
+    def start(self):
+        """Open the shared OpenRouter session unless one was injected; call from a running loop"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                },
+                connector=aiohttp.TCPConnector(limit=OPENROUTER_MAX_CONN, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=30),
+            )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def warm_up(self):
+        """Open the pooled connection to OpenRouter (DNS + TLS) and load the embedding
+        model before the first user request; failures are non-fatal"""
+        try:
+            async with self.session.get(
+                f"{self.base_url}/models", timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("OpenRouter warm-up failed: %s", e)
+        if self.cache.semantic:
+            try:
+                await asyncio.to_thread(self.cache.embed, "warm up")
+            except Exception as e:
+                logger.warning("Embedding model warm-up failed: %s", e)
+
+    def is_ready(self) -> bool:
+        """True when the shared session is open and an outbound call slot is free"""
+        return self.session is not None and not self.session.closed and not self._llm_sem.locked()
+    
+    async def analyze_speech(self, text: str, force_llm: bool = False) -> AnalysisResponse:
+        """Analyze speech and generate alternatives with the same length"""
+        
+        if not self.api_key:
+            logger.error("No OpenRouter API key configured!")
+            return self._fallback_response()
+
+        # Heuristic: the model adds little for a handful of words, so skip the round-trip
+        if not force_llm and len(text.split()) < SHORT_TEXT_WORDS:
+            logger.debug("Short input, serving templated response")
+            return self._short_text_response(text)
+
+        cached = self.cache.get(text)
+        if cached is not None:
+            logger.debug("Serving exact cache hit")
+            return cached
+
+        # Single-flight: concurrent callers with the same text share one upstream call.
+        # shield() keeps a disconnecting caller from cancelling the others' result.
+        key = self.cache.key(text)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._analyze_uncached(text))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            logger.debug("Joining in-flight analysis")
+        return await asyncio.shield(task)
+
+    async def analyze_speech_batch(self, texts: List[str], force_llm: bool = False,
+                                   concurrency: int = ANALYZE_BATCH_CONCURRENCY) -> List[AnalysisResponse]:
+        """Analyze many speeches concurrently, returning results in input order"""
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(text):
+            async with sem:
+                return await self.analyze_speech(text, force_llm=force_llm)
+
+        return await asyncio.gather(*(one(text) for text in texts))
+
+    async def _analyze_uncached(self, text: str) -> AnalysisResponse:
+        vector = None
+        if self.cache.semantic:
+            try:
+                vector = await asyncio.to_thread(self.cache.embed, text)
+            except Exception as e:
+                # Embedding is an optimisation; on failure treat it as a cache miss
+                logger.warning("Embedding failed, skipping semantic cache: %s", e)
+            cached = self.cache.get_similar(vector)
+            if cached is not None:
+                logger.debug("Serving semantic cache hit")
+                return cached
+        
+        prompt = _PROMPT_PREFIX + text + _PROMPT_SUFFIX
 
         data = {
             "model": self.model,
             "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.7,
-            "max_tokens": 15000
+            "response_format": ANALYSIS_RESPONSE_FORMAT,
+            # Only route to providers that honour response_format, so the schema is enforced
+            "provider": {"require_parameters": True},
+            # Greedy decoding: identical inputs give identical outputs, so replies are cacheable
+            "temperature": 0.0,
+            "top_p": 1.0,
+            "max_tokens": self._max_tokens(text)
         }
 
         try:
-            print(f"Making request to OpenRouter...")
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=data,
-                    timeout=30.0
+            logger.debug("Making request to OpenRouter...")
+            status, body = await self._post_completion(data)
+            
+            logger.debug("OpenRouter response status: %s", status)
+
+            if 400 <= status < 500 and status not in RETRY_STATUSES:
+                # Likely no provider for this model honours strict json_schema; retry once
+                # in plain JSON mode rather than silently serving the canned fallback
+                logger.error(
+                    "OpenRouter rejected the strict schema request (%s), retrying in json_object mode: %s",
+                    status, body
                 )
-                
-                print(f"OpenRouter response status: {response.status_code}")
-                
-                if response.status_code != 200:
-                    print(f"OpenRouter error: {response.text}")
-                    return self._fallback_response()
-                
-                result = response.json()
-                content = result["choices"][0]["message"]["content"]
-                
-                try:
-                    parsed_result = json.loads(content)
-                    print("Successfully parsed OpenRouter response")
-                    return parsed_result
-                except json.JSONDecodeError as e:
-                    print(f"JSON parsing error: {e}")
-                    print(f"Raw content: {content}")
-                    return self._fallback_response()
+                data = {key: value for key, value in data.items() if key != "provider"}
+                data["response_format"] = {"type": "json_object"}
+                status, body = await self._post_completion(data)
+            
+            if status != 200:
+                if 400 <= status < 500:
+                    logger.error("OpenRouter error %s: %s", status, body)
+                else:
+                    logger.warning("OpenRouter error %s: %s", status, body)
+                return self._fallback_response()
+            
+            result = orjson.loads(body)
+            choice = result["choices"][0]
+            content = choice["message"]["content"]
+
+            if choice.get("finish_reason") == "length":
+                logger.warning(
+                    "OpenRouter reply truncated at max_tokens=%s for a %s-word input",
+                    data["max_tokens"], len(text.split())
+                )
+                return self._fallback_response()
+            
+            try:
+                parsed_result = ANALYSIS_ADAPTER.validate_json(content)
+            except ValidationError as e:
+                # Rare with strict schema mode and require_parameters, but the provider is
+                # still the one enforcing it, so validate rather than trust
+                logger.warning("Invalid analysis JSON: %s", e)
+                logger.debug("Raw content: %s", content)
+                return self._fallback_response()
+
+            logger.debug("Successfully parsed OpenRouter response")
+            self.cache.put(text, parsed_result, vector)
+            return parsed_result
                     
         except Exception as e:
-            print(f"OpenRouter request error: {e}")
+            logger.warning("OpenRouter request error: %s", e)
             return self._fallback_response()
+
+    async def _post_completion(self, data: dict):
+        """POST to /chat/completions, retrying rate limits, 5xx and transport errors
+        with jittered exponential backoff. Returns (status, body) of the last attempt.
+
+        All attempts and backoff share one REQUEST_DEADLINE, so the worst case matches
+        the single 30s call this replaced rather than 30s per attempt.
+        """
+        payload = orjson.dumps(data)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + REQUEST_DEADLINE
+        for attempt in range(REQUEST_ATTEMPTS):
+            delay = RETRY_BASE_DELAY * 2 ** attempt + random.random() * 0.2
+            try:
+                async with self._llm_sem:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError("OpenRouter request deadline exceeded")
+                    async with self.session.post(
+                        f"{self.base_url}/chat/completions",
+                        data=payload,
+                        timeout=aiohttp.ClientTimeout(total=remaining)
+                    ) as response:
+                        status = response.status
+                        body = await response.read()
+                        retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == REQUEST_ATTEMPTS - 1 or loop.time() + delay >= deadline:
+                    raise
+                logger.warning("OpenRouter transport error, retrying in %.1fs: %s", delay, e)
+            else:
+                if status not in RETRY_STATUSES:
+                    return status, body
+                if retry_after is not None:
+                    try:
+                        delay = min(float(retry_after), MAX_RETRY_DELAY)
+                    except ValueError:
+                        pass
+                if attempt == REQUEST_ATTEMPTS - 1 or loop.time() + delay >= deadline:
+                    return status, body
+                logger.warning("OpenRouter returned %s, retrying in %.1fs", status, delay)
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _max_tokens(text: str) -> int:
+        """Output budget scaled to the input: three rewrites of roughly the same length"""
+        return max(MIN_OUTPUT_TOKENS, TOKENS_PER_INPUT_WORD * len(text.split()))
     
-    def _fallback_response(self):
-        """Fallback response when API fails"""
-        return {
+    def _short_text_response(self, text: str) -> AnalysisResponse:
+        """Fallback categories with the original text as each (length-matched) rewrite"""
+        response = self._fallback.model_copy(deep=True)
+        for alternate in response.alternateSpeeches:
+            alternate.speech = text
+        return response
+
+    def _fallback_response(self) -> AnalysisResponse:
+        """Fallback response when API fails; shared instance, so callers must not mutate it"""
+        return self._fallback
+
+    @staticmethod
+    def _build_fallback_response() -> AnalysisResponse:
+        return ANALYSIS_ADAPTER.validate_python({
             "category": "General",
             "demographics": ["Progressive", "Conservative", "Moderate"],
             "alternateSpeeches": [
@@ -108,7 +326,7 @@ class SpeechAnalysisService:
                     "speech": "A balanced approach considering all perspectives will yield the best results."
                 }
             ]
-        }
+        })
 
 # Initialize service
 speech_analysis = SpeechAnalysisService()
\ No newline at end of file
@@ -0,0 +1,76 @@
+import asyncio
+
+import orjson
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.services import SpeechAnalysisService
+
+TEXT = "We will invest in schools, roads and clean energy for every town."
+ANALYSIS = {
+    "category": "economics",
+    "demographics": ["Students", "Farmers", "Retirees"],
+    "alternateSpeeches": [
+        {"demographic": "Students", "speech": "a"},
+        {"demographic": "Farmers", "speech": "b"},
+        {"demographic": "Retirees", "speech": "c"},
+    ],
+}
+
+
+def completion(content=ANALYSIS, finish_reason="stop"):
+    return lambda payload: web.json_response({
+        "choices": [{
+            "message": {"content": orjson.dumps(content).decode()},
+            "finish_reason": finish_reason,
+        }]
+    })
+
+
+def error(status, retry_after="0"):
+    return lambda payload: web.Response(status=status, headers={"Retry-After": retry_after})
+
+
+class StubOpenRouter:
+    """Serves /chat/completions from canned responses, recording every request payload.
+
+    Each response is called with the decoded request payload; the last one repeats.
+    """
+
+    def __init__(self, *responses, delay=0.0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.payloads = []
+        self.active = 0
+        self.max_active = 0
+
+    @property
+    def calls(self):
+        return len(self.payloads)
+
+    async def handle(self, request):
+        payload = orjson.loads(await request.read())
+        self.payloads.append(payload)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay(payload) if callable(self.delay) else self.delay)
+            return self.responses[min(self.calls, len(self.responses)) - 1](payload)
+        finally:
+            self.active -= 1
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/chat/completions", self.handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.service = SpeechAnalysisService()
+        self.service.api_key = "test"
+        self.service.base_url = str(self.server.make_url("")).rstrip("/")
+        self.service.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.service.close()
+        await self.server.close()
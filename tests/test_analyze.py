@@ -0,0 +1,118 @@
+import asyncio
+
+from stubs import ANALYSIS, TEXT, StubOpenRouter, completion, error
+
+
+def test_truncated_reply_falls_back_without_caching():
+    async def run():
+        async with StubOpenRouter(completion(finish_reason="length")) as stub:
+            result = await stub.service.analyze_speech(TEXT)
+            return result, stub.service.cache.get(TEXT)
+
+    result, cached = asyncio.run(run())
+    assert result.category == "General"
+    assert cached is None
+
+
+def test_max_tokens_scales_with_input_length():
+    speech = " ".join(["word"] * 500)
+
+    async def run():
+        async with StubOpenRouter(completion()) as stub:
+            await stub.service.analyze_speech(speech)
+            return stub.payloads[0]["max_tokens"]
+
+    assert asyncio.run(run()) == 3000
+
+
+def test_rejected_strict_schema_retries_in_json_object_mode():
+    def strict_rejected(payload):
+        if payload["response_format"]["type"] == "json_schema":
+            return error(400)(payload)
+        return completion()(payload)
+
+    async def run():
+        async with StubOpenRouter(strict_rejected) as stub:
+            result = await stub.service.analyze_speech(TEXT)
+            return result, stub.payloads
+
+    result, payloads = asyncio.run(run())
+    assert result.category == "economics"
+    assert len(payloads) == 2
+    assert payloads[0]["provider"] == {"require_parameters": True}
+    assert payloads[1]["response_format"] == {"type": "json_object"}
+    assert "provider" not in payloads[1]
+
+
+def test_rejected_relaxed_request_falls_back():
+    async def run():
+        async with StubOpenRouter(error(400)) as stub:
+            result = await stub.service.analyze_speech(TEXT)
+            return result, stub.calls
+
+    result, calls = asyncio.run(run())
+    assert result.category == "General"
+    assert calls == 2
+
+
+SEVEN_WORDS = "We must fix the roads right now"
+
+
+def test_short_input_skips_upstream_and_leaves_fallback_intact():
+    async def run():
+        async with StubOpenRouter(completion()) as stub:
+            fallback = stub.service._fallback.model_dump()
+            result = await stub.service.analyze_speech(SEVEN_WORDS)
+            return stub.calls, result, fallback, stub.service._fallback.model_dump()
+
+    calls, result, before, after = asyncio.run(run())
+    assert calls == 0
+    assert [alt.speech for alt in result.alternateSpeeches] == [SEVEN_WORDS] * 3
+    assert after == before
+
+
+def test_force_llm_queries_model_for_short_input():
+    async def run():
+        async with StubOpenRouter(completion()) as stub:
+            result = await stub.service.analyze_speech(SEVEN_WORDS, force_llm=True)
+            return stub.calls, result
+
+    calls, result = asyncio.run(run())
+    assert calls == 1
+    assert result.category == "economics"
+
+
+def _echo_category(payload):
+    # Echo the speech back as the category so results can be matched to inputs
+    prompt = payload["messages"][0]["content"]
+    speech = prompt.split('Speech: "', 1)[1].split('"', 1)[0]
+    return completion({**ANALYSIS, "category": speech})(payload)
+
+
+def test_batch_preserves_input_order_and_respects_concurrency_cap():
+    texts = [f"{TEXT} Item {i}." for i in range(6)]
+
+    async def run():
+        # Earlier items answer slower, so completion order is the reverse of input order
+        delay = lambda payload: 0.05 * (6 - int(payload["messages"][0]["content"].split("Item ")[1][0]))
+        async with StubOpenRouter(_echo_category, delay=delay) as stub:
+            results = await stub.service.analyze_speech_batch(texts, concurrency=2)
+            return results, stub.max_active
+
+    results, max_active = asyncio.run(run())
+    assert [result.category for result in results] == texts
+    assert max_active == 2
+
+
+def test_batch_force_llm_bypasses_short_text_heuristic():
+    async def run():
+        async with StubOpenRouter(completion()) as stub:
+            skipped = await stub.service.analyze_speech_batch([SEVEN_WORDS])
+            calls_without = stub.calls
+            forced = await stub.service.analyze_speech_batch([SEVEN_WORDS], force_llm=True)
+            return calls_without, stub.calls, skipped[0], forced[0]
+
+    calls_without, calls_with, skipped, forced = asyncio.run(run())
+    assert (calls_without, calls_with) == (0, 1)
+    assert skipped.category == "General"
+    assert forced.category == "economics"
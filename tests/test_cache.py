@@ -0,0 +1,92 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.cache import ResponseCache
+
+
+def unit(i, dim=4):
+    return np.eye(dim, dtype=np.float32)[i]
+
+
+def test_exact_lookup_normalizes_text():
+    cache = ResponseCache(maxsize=4, ttl=60)
+    cache.put("  Hello World ", "response")
+    assert cache.get("hello world") == "response"
+
+
+def test_namespace_separates_models():
+    first = ResponseCache(maxsize=4, ttl=60, namespace="model-a")
+    second = ResponseCache(maxsize=4, ttl=60, namespace="model-b")
+    assert first.key("text") != second.key("text")
+
+
+def test_similar_lookup_respects_threshold():
+    cache = ResponseCache(maxsize=4, ttl=60, threshold=0.9)
+    cache.put("a", "response", unit(0))
+    close = np.array([0.95, 0.31, 0, 0], dtype=np.float32)
+    assert cache.get_similar(close) == "response"
+    assert cache.get_similar(unit(1)) is None
+
+
+def test_full_ring_overwrites_oldest_without_reallocating():
+    cache = ResponseCache(maxsize=3, ttl=60)
+    cache.put("t0", 0, unit(0))
+    matrix = cache._vectors
+    for i in range(1, 4):
+        cache.put(f"t{i}", i, unit(i))
+
+    assert cache._vectors is matrix
+    assert cache._vectors.shape == (3, 4)
+    # t0's row was overwritten by t3
+    assert cache.get_similar(unit(0)) is None
+    assert cache.get_similar(unit(3)) == 3
+    assert cache.get_similar(unit(1)) == 1
+
+
+def test_reput_reuses_slot():
+    cache = ResponseCache(maxsize=3, ttl=60)
+    cache.put("t0", 0, unit(0))
+    cache.put("t0", 1, unit(0))
+    assert cache._filled == 1
+    assert cache.get_similar(unit(0)) == 1
+
+
+def test_stale_vector_misses_and_slot_is_reused():
+    cache = ResponseCache(maxsize=2, ttl=60)
+    cache.put("t0", 0, unit(0))
+    cache.put("t1", 1, unit(1))
+    # Simulate expiry in the exact tier
+    del cache._exact[cache.key("t0")]
+
+    assert cache.get_similar(unit(0)) is None
+    cache.put("t2", 2, unit(2))
+    # The freed slot was reused, so t1 survives instead of being overwritten
+    assert cache.get_similar(unit(1)) == 1
+    assert cache.get_similar(unit(2)) == 2
+
+
+def test_stale_best_match_does_not_hide_fresh_match():
+    cache = ResponseCache(maxsize=4, ttl=60, threshold=0.9)
+    cache.put("stale", "old", unit(0))
+    cache.put("fresh", "new", np.array([0.96, 0.28, 0, 0], dtype=np.float32))
+    del cache._exact[cache.key("stale")]
+
+    assert cache.get_similar(unit(0)) == "new"
+    assert cache.key("stale") not in cache._slots
+
+
+def test_reused_free_slot_is_not_evicted_before_older_rows():
+    cache = ResponseCache(maxsize=3, ttl=60)
+    for i in range(3):
+        cache.put(f"t{i}", i, unit(i))
+    del cache._exact[cache.key("t0")]
+    cache.get_similar(unit(0))
+    # t3 lands in t0's freed row and is now the newest entry
+    cache.put("t3", 3, unit(3))
+    # A full matrix must evict t1, the oldest write, not t3
+    cache.put("t4", 4, np.array([0, 0, 0.6, 0.8], dtype=np.float32))
+
+    assert cache.get_similar(unit(3)) == 3
+    assert cache.get_similar(unit(1)) is None
+    assert cache.get_similar(unit(2)) == 2
@@ -0,0 +1,49 @@
+import asyncio
+
+from app import main
+from app.services import SpeechAnalysisService
+
+
+async def readyz_status(service, monkeypatch):
+    monkeypatch.setattr(main, "speech_analysis", service)
+    response = await main.readyz()
+    return getattr(response, "status_code", 200)
+
+
+def test_readyz_ok_with_open_session_and_free_slots(monkeypatch):
+    async def run():
+        service = SpeechAnalysisService()
+        service.start()
+        try:
+            return await readyz_status(service, monkeypatch)
+        finally:
+            await service.close()
+
+    assert asyncio.run(run()) == 200
+
+
+def test_readyz_503_when_session_closed(monkeypatch):
+    async def run():
+        service = SpeechAnalysisService()
+        service.start()
+        await service.close()
+        return await readyz_status(service, monkeypatch)
+
+    assert asyncio.run(run()) == 503
+
+
+def test_readyz_503_when_all_llm_slots_taken(monkeypatch):
+    async def run():
+        service = SpeechAnalysisService()
+        service.start()
+        try:
+            while not service._llm_sem.locked():
+                await service._llm_sem.acquire()
+            busy = await readyz_status(service, monkeypatch)
+            service._llm_sem.release()
+            free = await readyz_status(service, monkeypatch)
+            return busy, free
+        finally:
+            await service.close()
+
+    assert asyncio.run(run()) == (503, 200)
@@ -0,0 +1,65 @@
+import asyncio
+
+import aiohttp
+import orjson
+import pytest
+
+from app import services
+from stubs import StubOpenRouter, completion, error
+
+
+def test_retries_rate_limit_and_server_error_with_retry_after():
+    async def run():
+        async with StubOpenRouter(error(429), error(503), completion()) as stub:
+            status, body = await stub.service._post_completion({})
+            return stub.calls, status, body
+
+    calls, status, body = asyncio.run(run())
+    assert calls == 3
+    assert status == 200
+    assert orjson.loads(body)["choices"][0]["finish_reason"] == "stop"
+
+
+def test_returns_final_attempt_when_retries_exhausted():
+    async def run():
+        async with StubOpenRouter(error(503)) as stub:
+            status, _ = await stub.service._post_completion({})
+            return stub.calls, status
+
+    assert asyncio.run(run()) == (services.REQUEST_ATTEMPTS, 503)
+
+
+def test_non_retryable_status_is_returned_immediately():
+    async def run():
+        async with StubOpenRouter(error(400)) as stub:
+            status, _ = await stub.service._post_completion({})
+            return stub.calls, status
+
+    assert asyncio.run(run()) == (1, 400)
+
+
+def test_transport_error_is_reraised_on_last_attempt(monkeypatch):
+    monkeypatch.setattr(services, "RETRY_BASE_DELAY", 0.0)
+
+    async def run():
+        async with StubOpenRouter(completion()) as stub:
+            # Nothing listens here once the stub server is closed
+            await stub.server.close()
+            await stub.service._post_completion({})
+
+    with pytest.raises(aiohttp.ClientConnectionError):
+        asyncio.run(run())
+
+
+def test_retries_share_one_deadline(monkeypatch):
+    monkeypatch.setattr(services, "REQUEST_DEADLINE", 0.3)
+
+    async def run():
+        async with StubOpenRouter(completion(), delay=1.0) as stub:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            with pytest.raises(asyncio.TimeoutError):
+                await stub.service._post_completion({})
+            return loop.time() - started
+
+    assert asyncio.run(run()) < 1.0
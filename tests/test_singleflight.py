@@ -0,0 +1,31 @@
+import asyncio
+
+from stubs import TEXT, StubOpenRouter, completion
+
+
+def test_concurrent_identical_requests_share_one_upstream_call():
+    async def run():
+        async with StubOpenRouter(completion(), delay=0.1) as stub:
+            results = await asyncio.gather(*(stub.service.analyze_speech(TEXT) for _ in range(5)))
+            return stub.calls, results, stub.service._inflight
+
+    calls, results, inflight = asyncio.run(run())
+    assert calls == 1
+    assert all(result.category == "economics" for result in results)
+    assert inflight == {}
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    async def run():
+        async with StubOpenRouter(completion(), delay=0.1) as stub:
+            first = asyncio.create_task(stub.service.analyze_speech(TEXT))
+            second = asyncio.create_task(stub.service.analyze_speech(TEXT))
+            await asyncio.sleep(0.02)
+            first.cancel()
+            result = await second
+            return stub.calls, first.cancelled(), result
+
+    calls, cancelled, result = asyncio.run(run())
+    assert calls == 1
+    assert cancelled
+    assert result.category == "economics"